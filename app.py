@@ -1,3 +1,4 @@
+import os
 import streamlit as st
 import pandas as pd
 import numpy as np
@@ -5,6 +6,7 @@ from datetime import datetime, time, timedelta
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import time as time_module
+from streamlit_autorefresh import st_autorefresh
 
 # Import vlastních modulů
 from calculator import OptionsCalculator
@@ -22,133 +24,121 @@ st.set_page_config(
 )
 
 # ===== CUSTOM CSS PRO KRÁSNÝ DESIGN =====
-st.markdown("""
-<style>
-    /* Hlavní barvy */
-    :root {
-        --primary-color: #1f77b4;
-        --success-color: #2ecc71;
-        --danger-color: #e74c3c;
-        --warning-color: #f39c12;
-        --dark-bg: #2c3e50;
-        --light-bg: #ecf0f1;
-    }
-    
-    /* Metriky */
-    [data-testid="metric-container"] {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        padding: 15px;
-        border-radius: 10px;
-        color: white;
-        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-    }
-    
-    [data-testid="metric-container"] [data-testid="metric-label"] {
-        color: rgba(255,255,255,0.9);
-        font-weight: 600;
-    }
-    
-    [data-testid="metric-container"] [data-testid="metric-value"] {
-        color: white;
-        font-size: 1.8rem;
-        font-weight: 700;
-    }
-    
-    /* Boxy pro výsledky */
-    .result-box {
-        padding: 20px;
-        border-radius: 10px;
-        margin: 10px 0;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-    }
-    
-    .success-box {
-        background: linear-gradient(135deg, #84fab0 0%, #8fd3f4 100%);
-        border-left: 5px solid #2ecc71;
-    }
-    
-    .warning-box {
-        background: linear-gradient(135deg, #fcb69f 0%, #ffecd2 100%);
-        border-left: 5px solid #f39c12;
-    }
-    
-    .info-box {
-        background: linear-gradient(135deg, #a8edea 0%, #fed6e3 100%);
-        border-left: 5px solid #3498db;
-    }
-    
-    .danger-box {
-        background: linear-gradient(135deg, #ff9a9e 0%, #fecfef 100%);
-        border-left: 5px solid #e74c3c;
-    }
-    
-    /* Tlačítka */
-    .stButton > button {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        border: none;
-        padding: 10px 24px;
-        border-radius: 5px;
-        font-weight: 600;
-        transition: transform 0.2s;
-    }
-    
-    .stButton > button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 4px 8px rgba(0,0,0,0.2);
-    }
-    
-    /* Sidebar */
-    .css-1d391kg {
-        background: linear-gradient(180deg, #2c3e50 0%, #34495e 100%);
-    }
-    
-    /* Headers */
-    h1 {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        font-weight: 800;
-    }
-    
-    h2, h3 {
-        color: #2c3e50;
-        font-weight: 700;
-    }
-    
-    /* Tabulky */
-    .dataframe {
-        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        border-radius: 5px;
-    }
-    
-    /* Animace */
-    @keyframes pulse {
-        0% { opacity: 1; }
-        50% { opacity: 0.6; }
-        100% { opacity: 1; }
-    }
-    
-    .live-indicator {
-        animation: pulse 2s infinite;
-    }
-</style>
-""", unsafe_allow_html=True)
+@st.cache_data
+def load_css():
+    """Načte CSS ze statického souboru (jednou za proces)"""
+    css_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'style.css')
+    with open(css_path, encoding='utf-8') as f:
+        return f"<style>{f.read()}</style>"
+
+st.markdown(load_css(), unsafe_allow_html=True)
 
 # ===== INICIALIZACE =====
 @st.cache_resource
 def init_services():
     """Inicializuje služby s cachováním"""
-    return MarketDataFetcher(), OptionsCalculator(), OptionFinder()
+    fetcher, calc, finder = MarketDataFetcher(), OptionsCalculator(), OptionFinder()
+    
+    # Zahřátí JIT a lazy inicializace SciPy, aby první interakce neplatila warmup
+    for is_call in (True, False):
+        calc.calculate_greeks(spot=100.0, strike=100.0, dte=1, iv=0.20, is_call=is_call)
+        finder.find_best_strike(
+            instrument='SPY', current_price=100.0, entry=100.0,
+            target=102.0 if is_call else 98.0, stop=99.0 if is_call else 101.0,
+            risk_amount=1000, is_call=is_call, dte=1, iv=0.20
+        )
+    
+    return fetcher, calc, finder
 
 data_fetcher, calculator, option_finder = init_services()
 
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_prices(time_bucket):
+    """Ceny cachované napříč reruny, time_bucket určuje efektivní TTL"""
+    return data_fetcher.get_all_prices()
+
+@st.cache_data(ttl=10, show_spinner=False)
+def _cached_option_chain(instrument, dte):
+    """Option chain cachovaný pro (instrument, DTE)"""
+    return data_fetcher.get_option_chain_live(instrument, dte)
+
+# ===== PLOTLY ŠABLONY =====
+LEVEL_INSTRUMENTS = ['SPY', 'ES', 'XSP']
+
+@st.cache_resource
+def levels_figure_skeleton():
+    """Statická kostra grafu trading levels (plní se daty v každém rerunu)"""
+    fig = go.Figure()
+    y_positions = list(range(len(LEVEL_INSTRUMENTS)))
+    
+    # Range čáry jako jeden trace (None odděluje segmenty), vykreslené pod markery
+    fig.add_trace(go.Scatter(
+        mode='lines',
+        name='Range',
+        line=dict(color="gray", width=3, dash="dot"),
+        hoverinfo='skip',
+        showlegend=False
+    ))
+    
+    # Jeden trace na roli (entry/SL/TP) místo jednoho na každý instrument
+    fig.add_traces([
+        go.Scatter(y=y_positions, mode='markers', name=name, marker=marker, showlegend=False)
+        for name, marker in [
+            ('Entry', dict(size=15, color='blue', symbol='diamond')),
+            ('SL', dict(size=12, color='red', symbol='x')),
+            ('TP', dict(size=12, color='green', symbol='star')),
+        ]
+    ])
+    
+    fig.update_layout(
+        title="Trading Levels Visualization",
+        xaxis_title="Price",
+        yaxis=dict(
+            tickmode='array',
+            tickvals=y_positions,
+            ticktext=LEVEL_INSTRUMENTS
+        ),
+        height=300,
+        hovermode='x unified'
+    )
+    return fig
+
+@st.cache_resource
+def pl_figure_skeleton():
+    """Statická kostra P/L diagramu"""
+    fig = go.Figure()
+    
+    # P/L křivka (WebGL čte typed arrays přímo)
+    fig.add_trace(go.Scattergl(
+        mode='lines',
+        name='P/L at Expiry',
+        line=dict(color='blue', width=3)
+    ))
+    
+    fig.update_layout(
+        title="P/L Diagram při expiraci",
+        yaxis_title="Profit/Loss ($)",
+        height=400,
+        hovermode='x unified'
+    )
+    return fig
+
 # ===== SESSION STATE =====
 if 'last_refresh' not in st.session_state:
     st.session_state.last_refresh = datetime.now()
 if 'trade_history' not in st.session_state:
     st.session_state.trade_history = []
 
+def memoize_in_session(name, key, compute):
+    """Vrátí výsledek z minulého rerunu, pokud se jeho vstupy (key) nezměnily"""
+    cached = st.session_state.get(f"memo_{name}")
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    
+    value = compute()
+    st.session_state[f"memo_{name}"] = (key, value)
+    return value
+
 # ===== HLAVIČKA =====
 col1, col2, col3 = st.columns([2, 1, 1])
 with col1:
@@ -174,6 +164,7 @@ with col2:
 
 with col3:
     if st.button("🔄 Refresh Data", key="refresh_main"):
+        _cached_prices.clear()
         st.session_state.last_refresh = datetime.now()
         st.rerun()
     st.caption(f"Last update: {st.session_state.last_refresh.strftime('%H:%M:%S')}")
@@ -194,7 +185,9 @@ with st.sidebar:
     
     # Aktuální ceny
     st.subheader("💹 Live Market Data")
-    prices = data_fetcher.get_all_prices()
+    # Během otevřeného trhu 1s (rerun jen čte in-process cache fetcheru), jinak 60s
+    prices_ttl = 1 if market_status['is_open'] else 60
+    prices = _cached_prices(int(time_module.time() // prices_ttl))
     
     if prices.get('SPX'):
         st.metric("S&P 500", f"${prices['SPX']:.2f}")
@@ -296,20 +289,30 @@ with st.sidebar:
 # ===== HLAVNÍ OBSAH =====
 
 # Získání dat a výpočty
-conversions = calculator.convert_spx_levels(entry_price, stop_loss, take_profit)
+conversions = memoize_in_session(
+    'conversions',
+    (entry_price, stop_loss, take_profit),
+    lambda: calculator.convert_spx_levels(entry_price, stop_loss, take_profit)
+)
 
 # První řádek - Live data a konverze
 st.markdown("### 📊 Real-time Market Overview")
 col1, col2, col3, col4 = st.columns(4)
 
-instruments = [
-    ("SPY", "SPDR S&P 500 ETF", prices.get('SPY', 0)),
-    ("ES", "E-mini Futures", prices.get('ES', 0)),
-    ("XSP", "Mini-SPX Index", prices.get('XSP', 0)),
-    ("VIX", "Volatility Index", prices.get('VIX', 0))
-]
+overview_symbols = np.array(['SPY', 'ES', 'XSP', 'VIX'])
+overview_names = ["SPDR S&P 500 ETF", "E-mini Futures", "Mini-SPX Index", "Volatility Index"]
+overview_prices = np.array([prices.get(symbol, 0) for symbol in overview_symbols], dtype=np.float64)
+overview_mults = np.array([conversions.get(symbol, {}).get('multiplier', 1.0) for symbol in overview_symbols])
+
+# Odchylka od SPX * multiplier v % pro všechny instrumenty najednou (VIX nemá smysl)
+overview_changes = np.where(
+    overview_symbols == "VIX",
+    np.nan,
+    (overview_prices / current_spx - overview_mults) * 100
+)
 
-for col, (symbol, name, price) in zip([col1, col2, col3, col4], instruments):
+for col, symbol, name, price, change in zip([col1, col2, col3, col4], overview_symbols,
+                                            overview_names, overview_prices, overview_changes):
     with col:
         if symbol == "VIX":
             color = "🔴" if price > 20 else "🟢"
@@ -319,11 +322,10 @@ for col, (symbol, name, price) in zip([col1, col2, col3, col4], instruments):
                 f"{'High' if price > 20 else 'Low'} volatility"
             )
         else:
-            change = ((price / current_spx) - conversions.get(symbol, {}).get('multiplier', 1)) * 100 if symbol != "VIX" else 0
             st.metric(
                 name,
                 f"${price:.2f}",
-                f"{change:+.3f}%" if symbol != "VIX" else None
+                f"{change:+.3f}%"
             )
 
 # Druhý řádek - Konvertované úrovně
@@ -334,76 +336,41 @@ col1, col2 = st.columns([1, 2])
 
 with col1:
     # Tabulka konverzí
-    conv_data = []
-    for inst in ['SPY', 'ES', 'XSP']:
-        conv_data.append({
-            'Instrument': inst,
-            'Entry': f"${conversions[inst]['entry']:.2f}",
-            'Stop Loss': f"${conversions[inst]['sl']:.2f}",
-            'Take Profit': f"${conversions[inst]['tp']:.2f}",
-            'Range': f"{abs(conversions[inst]['tp'] - conversions[inst]['entry']):.2f}"
-        })
-    
-    conv_df = pd.DataFrame(conv_data)
-    st.dataframe(conv_df, use_container_width=True, hide_index=True)
+    # Jeden float64 blok [instrument, entry/sl/tp] místo řádkových dictů
+    conv_levels = np.array(
+        [[conversions[inst]['entry'], conversions[inst]['sl'], conversions[inst]['tp']]
+         for inst in LEVEL_INSTRUMENTS],
+        dtype=np.float64
+    )
+    conv_levels = np.column_stack([conv_levels, np.abs(conv_levels[:, 2] - conv_levels[:, 0])])
+    
+    conv_df = pd.DataFrame(conv_levels, columns=['Entry', 'Stop Loss', 'Take Profit', 'Range'])
+    conv_df.insert(0, 'Instrument', LEVEL_INSTRUMENTS)
+    
+    # Číselný DataFrame, formátování řeší Styler
+    st.dataframe(
+        conv_df.style.format({
+            'Entry': '${:.2f}',
+            'Stop Loss': '${:.2f}',
+            'Take Profit': '${:.2f}',
+            'Range': '{:.2f}'
+        }),
+        use_container_width=True,
+        hide_index=True
+    )
 
 with col2:
-    # Vizualizace úrovní
-    fig = go.Figure()
+    # Vizualizace úrovní (kopie cachované kostry, sdílí se mezi sessions)
+    fig = go.Figure(levels_figure_skeleton())
     
-    # Pro každý instrument
-    for i, inst in enumerate(['SPY', 'ES', 'XSP']):
-        y_pos = i
-        
-        # Entry point
-        fig.add_trace(go.Scatter(
-            x=[conversions[inst]['entry']],
-            y=[y_pos],
-            mode='markers',
-            name=f'{inst} Entry',
-            marker=dict(size=15, color='blue', symbol='diamond'),
-            showlegend=False
-        ))
-        
-        # Stop Loss
-        fig.add_trace(go.Scatter(
-            x=[conversions[inst]['sl']],
-            y=[y_pos],
-            mode='markers',
-            name=f'{inst} SL',
-            marker=dict(size=12, color='red', symbol='x'),
-            showlegend=False
-        ))
-        
-        # Take Profit
-        fig.add_trace(go.Scatter(
-            x=[conversions[inst]['tp']],
-            y=[y_pos],
-            mode='markers',
-            name=f'{inst} TP',
-            marker=dict(size=12, color='green', symbol='star'),
-            showlegend=False
-        ))
-        
-        # Range line
-        fig.add_shape(
-            type="line",
-            x0=conversions[inst]['sl'], x1=conversions[inst]['tp'],
-            y0=y_pos, y1=y_pos,
-            line=dict(color="gray", width=3, dash="dot"),
-        )
+    range_x, range_y = [], []
+    for y_pos, inst in enumerate(LEVEL_INSTRUMENTS):
+        range_x.extend([conversions[inst]['sl'], conversions[inst]['tp'], None])
+        range_y.extend([y_pos, y_pos, None])
+    fig.data[0].update(x=range_x, y=range_y)
     
-    fig.update_layout(
-        title="Trading Levels Visualization",
-        xaxis_title="Price",
-        yaxis=dict(
-            tickmode='array',
-            tickvals=[0, 1, 2],
-            ticktext=['SPY', 'ES', 'XSP']
-        ),
-        height=300,
-        hovermode='x unified'
-    )
+    for trace, level in zip(fig.data[1:], ('entry', 'sl', 'tp')):
+        trace.x = [conversions[inst][level] for inst in LEVEL_INSTRUMENTS]
     
     st.plotly_chart(fig, use_container_width=True)
 
@@ -422,16 +389,22 @@ with col1:
     )
     
     # Najdi optimální opci
-    optimal_option = option_finder.find_best_strike(
-        instrument=selected_instrument,
-        current_price=prices.get(selected_instrument, conversions[selected_instrument]['entry']),
-        entry=conversions[selected_instrument]['entry'],
-        target=conversions[selected_instrument]['tp'],
-        stop=conversions[selected_instrument]['sl'],
-        risk_amount=risk_amount,
-        is_call=is_call,
-        dte=dte_choice,
-        iv=iv_override/100
+    option_current_price = prices.get(selected_instrument, conversions[selected_instrument]['entry'])
+    optimal_option = memoize_in_session(
+        'optimal_option',
+        (selected_instrument, option_current_price, entry_price, stop_loss, take_profit,
+         risk_amount, is_call, dte_choice, iv_override),
+        lambda: option_finder.find_best_strike(
+            instrument=selected_instrument,
+            current_price=option_current_price,
+            entry=conversions[selected_instrument]['entry'],
+            target=conversions[selected_instrument]['tp'],
+            stop=conversions[selected_instrument]['sl'],
+            risk_amount=risk_amount,
+            is_call=is_call,
+            dte=dte_choice,
+            iv=iv_override/100
+        )
     )
 
 with col2:
@@ -468,30 +441,20 @@ if optimal_option and optimal_option['found']:
         spot_range = np.linspace(
             conversions[selected_instrument]['sl'] * 0.98,
             conversions[selected_instrument]['tp'] * 1.02,
-            100
+            100,
+            dtype=np.float32
         )
         
-        pl_data = []
-        for spot in spot_range:
-            pl = calculator.calculate_option_pl(
-                spot_price=spot,
-                strike=optimal_option['strike'],
-                premium=optimal_option['entry_price'],
-                contracts=optimal_option['contracts'],
-                is_call=is_call
-            )
-            pl_data.append(pl)
-        
-        fig = go.Figure()
-        
-        # P/L křivka
-        fig.add_trace(go.Scatter(
-            x=spot_range,
-            y=pl_data,
-            mode='lines',
-            name='P/L at Expiry',
-            line=dict(color='blue', width=3)
-        ))
+        pl_data = calculator.calculate_option_pl_vec(
+            spot_prices=spot_range,
+            strike=optimal_option['strike'],
+            premium=optimal_option['entry_price'],
+            contracts=optimal_option['contracts'],
+            is_call=is_call
+        )
+
+        fig = go.Figure(pl_figure_skeleton())
+        fig.data[0].update(x=spot_range, y=pl_data)
         
         # Horizontální čáry
         fig.add_hline(y=0, line_dash="dash", line_color="gray", annotation_text="Break Even")
@@ -503,24 +466,22 @@ if optimal_option and optimal_option['found']:
         fig.add_vline(x=conversions[selected_instrument]['tp'], line_dash="dot", line_color="green", annotation_text="Target")
         fig.add_vline(x=conversions[selected_instrument]['sl'], line_dash="dot", line_color="red", annotation_text="Stop")
         
-        fig.update_layout(
-            title="P/L Diagram při expiraci",
-            xaxis_title=f"{selected_instrument} Price",
-            yaxis_title="Profit/Loss ($)",
-            height=400,
-            hovermode='x unified'
-        )
+        fig.update_layout(xaxis_title=f"{selected_instrument} Price")
         
         st.plotly_chart(fig, use_container_width=True)
     
     with col2:
         # Greeks
-        greeks = calculator.calculate_greeks(
-            spot=prices.get(selected_instrument, conversions[selected_instrument]['entry']),
-            strike=optimal_option['strike'],
-            dte=dte_choice if dte_choice > 0 else 0.25,
-            iv=iv_override/100,
-            is_call=is_call
+        greeks = memoize_in_session(
+            'greeks',
+            (option_current_price, optimal_option['strike'], dte_choice, iv_override, is_call),
+            lambda: calculator.calculate_greeks(
+                spot=option_current_price,
+                strike=optimal_option['strike'],
+                dte=dte_choice if dte_choice > 0 else 0.25,
+                iv=iv_override/100,
+                is_call=is_call
+            )
         )
         
         st.markdown("#### Greeks")
@@ -545,9 +506,9 @@ if optimal_option and optimal_option['found']:
         prob_df = pd.DataFrame({
             'Scénář': ['🎯 Dosažení TP', '🛑 Dosažení SL', '↔️ Mezi úrovněmi'],
             'Pravděpodobnost': [
-                f"{optimal_option['probability']:.1%}",
-                f"{optimal_option.get('prob_loss', 0.3):.1%}",
-                f"{(1 - optimal_option['probability'] - optimal_option.get('prob_loss', 0.3)):.1%}"
+                optimal_option['probability'],
+                optimal_option.get('prob_loss', 0.3),
+                1 - optimal_option['probability'] - optimal_option.get('prob_loss', 0.3)
             ],
             'Výsledek': [
                 f"+${optimal_option['max_profit']:.0f}",
@@ -556,7 +517,11 @@ if optimal_option and optimal_option['found']:
             ]
         })
         
-        st.dataframe(prob_df, use_container_width=True, hide_index=True)
+        st.dataframe(
+            prob_df.style.format({'Pravděpodobnost': '{:.1%}'}),
+            use_container_width=True,
+            hide_index=True
+        )
 
 # Pátý řádek - Exekuční plán
 st.markdown("### 📝 Exekuční Plán")
@@ -574,8 +539,11 @@ with col1:
         "Risk/Reward > 1:2"
     ]
     
-    for item in checklist:
-        st.checkbox(item, key=f"check_{item}")
+    # Jeden widget místo checkboxu pro každou položku
+    selected_checks = st.multiselect("Splněno:", checklist, default=[], key="checklist")
+    st.markdown("\n".join(
+        f"- {'✅' if item in selected_checks else '⬜'} {item}" for item in checklist
+    ))
 
 with col2:
     st.markdown("#### 2️⃣ Entry Orders")
@@ -617,24 +585,25 @@ if st.checkbox("📊 Zobrazit Live Option Chain", value=False):
     st.markdown("### 📊 Live Option Chain")
     
     with st.spinner("Načítám option chain..."):
-        chain_data = data_fetcher.get_option_chain_live(selected_instrument, dte_choice)
+        chain_data = _cached_option_chain(selected_instrument, dte_choice)
         
         if chain_data:
-            col1, col2 = st.columns(2)
+            chain_columns = ['strike', 'bid', 'ask', 'volume', 'openInterest', 'impliedVolatility']
+            center_strike = optimal_option['strike']
             
-            with col1:
-                st.markdown("#### Calls")
-                calls_display = chain_data['calls'][['strike', 'bid', 'ask', 'volume', 'openInterest', 'impliedVolatility']]
-                calls_display = calls_display[(calls_display['strike'] >= optimal_option['strike'] - 5) & 
-                                             (calls_display['strike'] <= optimal_option['strike'] + 5)]
-                st.dataframe(calls_display, use_container_width=True)
+            col1, col2 = st.columns(2)
             
-            with col2:
-                st.markdown("#### Puts")
-                puts_display = chain_data['puts'][['strike', 'bid', 'ask', 'volume', 'openInterest', 'impliedVolatility']]
-                puts_display = puts_display[(puts_display['strike'] >= optimal_option['strike'] - 5) & 
-                                           (puts_display['strike'] <= optimal_option['strike'] + 5)]
-                st.dataframe(puts_display, use_container_width=True)
+            for col, title, side in [(col1, "Calls", 'calls'), (col2, "Puts", 'puts')]:
+                with col:
+                    st.markdown(f"#### {title}")
+                    chain_df = chain_data[side]
+                    
+                    # Strikes v chainu jsou seřazené -> binární vyhledání okna ±5
+                    strikes = chain_df['strike'].to_numpy()
+                    lo = np.searchsorted(strikes, center_strike - 5, side='left')
+                    hi = np.searchsorted(strikes, center_strike + 5, side='right')
+                    
+                    st.dataframe(chain_df.iloc[lo:hi][chain_columns], use_container_width=True)
 
 # Footer
 st.divider()
@@ -666,7 +635,6 @@ with col3:
     - Discord: #options-trading
     """)
 
-# Auto-refresh
+# Auto-refresh (client-side timer, neblokuje script thread)
 if st.sidebar.checkbox("🔄 Auto-refresh (30s)", value=False):
-    time_module.sleep(30)
-    st.rerun()
+    st_autorefresh(interval=30_000, key="autoref")
@@ -1,9 +1,79 @@
+import math
 import numpy as np
-from scipy import stats
-from scipy.optimize import minimize_scalar
+from numba import njit
+from numpy import log as _log, sqrt as _sqrt, exp as _exp
+from scipy.special import ndtr as _ndtr, ndtri as _ndtri, log_ndtr as _log_ndtr
 import pandas as pd
 from datetime import datetime, timedelta
 
+# 1 / sqrt(2 * pi) pro inline PDF standardního normálního rozdělení
+_INV_SQRT_2PI = 0.3989422804014327
+_INV_SQRT_2 = 0.7071067811865476
+
+# Pod touto hodnotou σ√T se Black-Scholes nahrazuje limitou v nule
+_MIN_VOL_TIME = 1e-10
+
+@njit(cache=True, fastmath=True)
+def _ndtr_numba(x):
+    """
+    CDF standardního normálního rozdělení pro Numba kernely
+    Přes erfc, aby levý chvost neztrácel přesnost (1 + erf → 0)
+    """
+    return 0.5 * math.erfc(-x * _INV_SQRT_2)
+
+
+@njit(cache=True, fastmath=True)
+def _bs_greeks(spot, strike, t, r, iv, is_call):
+    """
+    Skalární Black-Scholes Greeks kompilované přes Numba
+    Vrací (delta, gamma, theta, vega, rho, price)
+    """
+    # Společné mezivýsledky pro všechny Greeks (sqrt a exp jen jednou)
+    sqrt_t = math.sqrt(t)
+    sig_t = iv * sqrt_t
+    k_disc = strike * math.exp(-r * t)
+
+    if sig_t < _MIN_VOL_TIME:
+        # Limita σ√T → 0: d1 = d2 → ±∞ podle moneyness, PDF → 0
+        # (±40 dává N(·) přesně 0 nebo 1 a s fastmath se vyhne inf)
+        d1 = 40.0 if spot > k_disc else -40.0
+        d2 = d1
+        pdf_d1 = 0.0
+        time_decay = 0.0
+        gamma = 0.0
+    else:
+        d1 = (math.log(spot / strike) + (r + 0.5 * iv * iv) * t) / sig_t
+        d2 = d1 - sig_t
+
+        # PDF standardního normálního rozdělení
+        pdf_d1 = _INV_SQRT_2PI * math.exp(-0.5 * d1 * d1)
+        time_decay = spot * pdf_d1 * iv / (2 * sqrt_t)
+
+        # Gamma (stejné pro call i put)
+        gamma = pdf_d1 / (spot * sig_t)
+
+    if is_call:
+        cdf_d1 = _ndtr_numba(d1)
+        cdf_d2 = _ndtr_numba(d2)
+        delta = cdf_d1
+        # Theta (roční, převedeme na denní)
+        theta = -(time_decay + r * k_disc * cdf_d2) / 365
+        rho = k_disc * t * cdf_d2 / 100
+        price = spot * cdf_d1 - k_disc * cdf_d2
+    else:
+        cdf_minus_d1 = _ndtr_numba(-d1)
+        cdf_minus_d2 = _ndtr_numba(-d2)
+        delta = -cdf_minus_d1
+        theta = -(time_decay - r * k_disc * cdf_minus_d2) / 365
+        rho = -k_disc * t * cdf_minus_d2 / 100
+        price = k_disc * cdf_minus_d2 - spot * cdf_minus_d1
+
+    # Vega (na 1% změnu IV)
+    vega = spot * pdf_d1 * sqrt_t / 100
+
+    return delta, gamma, theta, vega, rho, price
+
+
 class OptionsCalculator:
     """
     Přesné výpočty pro opce s Black-Scholes modelem
@@ -18,6 +88,11 @@ class OptionsCalculator:
             'SPX': 1.0           # Base
         }
         
+        # Předpočítaný vektor faktorů pro vektorizovanou konverzi
+        self._instruments = np.array(list(self.conversion_factors))
+        self._factor_vector = np.array(list(self.conversion_factors.values()), dtype=np.float64)
+        self._es_index = list(self.conversion_factors).index('ES')
+        
         # Contract multipliers
         self.multipliers = {
             'SPY': 100,          # Standard equity options
@@ -29,58 +104,74 @@ class OptionsCalculator:
         # Risk-free rate (aktuální US Treasury)
         self.risk_free_rate = 0.0525  # 5.25% as of 2024
         
+        # ES fair value: F = S * e^((r - q) * t), rozdíl F - S = S * (e^((r - q) * t) - 1)
+        days_to_expiry = 30  # Průměrný futures contract
+        dividend_yield = 0.0142  # Dividendový yield S&P 500 (průměr, 1.42%)
+        self._es_fair_value_premium = math.exp(
+            (self.risk_free_rate - dividend_yield) * (days_to_expiry / 365)
+        ) - 1.0
+        
     def convert_spx_levels(self, spx_entry, spx_sl, spx_tp):
         """
         Přesná konverze SPX úrovní na ostatní instrumenty
         """
-        conversions = {}
-        
-        for instrument, factor in self.conversion_factors.items():
-            if instrument == 'ES':
-                # ES futures mají fair value premium/discount
-                fair_value = self._calculate_es_fair_value(spx_entry)
-                conversions[instrument] = {
-                    'entry': spx_entry + fair_value,
-                    'sl': spx_sl + fair_value,
-                    'tp': spx_tp + fair_value,
-                    'multiplier': 1.0,
-                    'fair_value': fair_value
-                }
-            elif instrument == 'SPX':
-                conversions[instrument] = {
-                    'entry': spx_entry,
-                    'sl': spx_sl,
-                    'tp': spx_tp,
-                    'multiplier': factor
-                }
-            else:
-                # SPY a XSP jsou přímé násobky
-                conversions[instrument] = {
-                    'entry': spx_entry * factor,
-                    'sl': spx_sl * factor,
-                    'tp': spx_tp * factor,
-                    'multiplier': factor
-                }
+        soa = self.convert_spx_levels_soa(spx_entry, spx_sl, spx_tp)
+        
+        conversions = {
+            instrument: {'entry': entry, 'sl': sl, 'tp': tp, 'multiplier': multiplier}
+            for instrument, entry, sl, tp, multiplier in zip(
+                soa['instruments'].tolist(), soa['entry'].tolist(), soa['sl'].tolist(),
+                soa['tp'].tolist(), soa['multiplier'].tolist()
+            )
+        }
+        
+        # ES futures mají fair value premium/discount
+        conversions['ES']['fair_value'] = float(soa['fair_value'][self._es_index])
         
         return conversions
     
-    def _calculate_es_fair_value(self, spx_price):
+    def convert_spx_levels_soa(self, spx_entry, spx_sl, spx_tp):
         """
-        Vypočítá fair value pro ES futures
-        Zahrnuje úroky a dividendy
+        Konverze SPX úrovní ve tvaru struct-of-arrays
+        Každé pole je indexované instrumenty v pořadí conversion_factors
         """
-        days_to_expiry = 30  # Průměrný futures contract
-        time_to_expiry = days_to_expiry / 365
+        converted = self.convert_spx_levels_array([spx_entry, spx_sl, spx_tp])
         
-        # Dividendový yield S&P 500 (průměr)
-        dividend_yield = 0.0142  # 1.42%
+        return {
+            'instruments': self._instruments.copy(),
+            'entry': converted[:, 0],
+            'sl': converted[:, 1],
+            'tp': converted[:, 2],
+            'multiplier': self._factor_vector.copy(),
+            'fair_value': self._fair_value_offsets(spx_entry)
+        }
+    
+    def convert_spx_levels_array(self, levels_arr):
+        """
+        Vektorizovaná konverze pole SPX úrovní (entry, sl, tp)
+        Vrací ndarray [instrument, úroveň] v pořadí conversion_factors
+        """
+        levels = np.asarray(levels_arr, dtype=np.float64)
         
-        # Fair value = S * e^((r - q) * t)
-        fair_value_multiplier = np.exp((self.risk_free_rate - dividend_yield) * time_to_expiry)
-        theoretical_futures = spx_price * fair_value_multiplier
+        # ES posunuto o fair value spočítanou z entry úrovně
+        offsets = self._fair_value_offsets(levels[0])
         
-        # Rozdíl
-        return theoretical_futures - spx_price
+        return levels[np.newaxis, :] * self._factor_vector[:, np.newaxis] + offsets[:, np.newaxis]
+    
+    def _fair_value_offsets(self, spx_entry):
+        """
+        Vektor fair value posunů pro instrumenty (nenulový jen pro ES)
+        """
+        offsets = np.zeros(len(self._factor_vector))
+        offsets[self._es_index] = self._calculate_es_fair_value(spx_entry)
+        return offsets
+    
+    def _calculate_es_fair_value(self, spx_price):
+        """
+        Vypočítá fair value pro ES futures
+        Zahrnuje úroky a dividendy (multiplikátor je předpočítaný v __init__)
+        """
+        return spx_price * self._es_fair_value_premium
     
     def black_scholes(self, S, K, T, r, sigma, option_type='call'):
         """
@@ -95,66 +186,128 @@ class OptionsCalculator:
                 return max(K - S, 0)
         
         # Výpočet d1 a d2
-        d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * np.sqrt(T))
-        d2 = d1 - sigma * np.sqrt(T)
+        sqrt_T = _sqrt(T)
+        exp_rT = _exp(-r * T)
+        vol_T = sigma * sqrt_T
+        
+        # Limita σ√T → 0 (těsně před expirací ATM nebo nulová IV), d1 by bylo 0/0
+        if vol_T < _MIN_VOL_TIME:
+            if option_type == 'call':
+                return max(S - K * exp_rT, 0)
+            else:
+                return max(K * exp_rT - S, 0)
+        
+        d1 = (_log(S / K) + (r + 0.5 * sigma ** 2) * T) / vol_T
+        d2 = d1 - vol_T
         
         # Cena opce
         if option_type == 'call':
-            price = S * stats.norm.cdf(d1) - K * np.exp(-r * T) * stats.norm.cdf(d2)
+            price = S * _ndtr(d1) - K * exp_rT * _ndtr(d2)
         else:
-            price = K * np.exp(-r * T) * stats.norm.cdf(-d2) - S * stats.norm.cdf(-d1)
+            price = K * exp_rT * _ndtr(-d2) - S * _ndtr(-d1)
         
         return price
     
-    def calculate_greeks(self, spot, strike, dte, iv, is_call=True):
+    def black_scholes_vec(self, S, K, T, r, sigma, option_type='call'):
         """
-        Vypočítá všechny Greeks s vysokou přesností
+        Vektorizovaný Black-Scholes přes pole strikes (nebo spotů)
         """
-        T = max(dte / 365, 0.001)  # Čas v letech
-        r = self.risk_free_rate
-        sigma = iv
-        S = spot
-        K = strike
+        S = np.asarray(S, dtype=np.float64)
+        K = np.asarray(K, dtype=np.float64)
+        
+        # Pro expirované opce
+        if T <= 0:
+            if option_type == 'call':
+                return np.maximum(S - K, 0.0)
+            else:
+                return np.maximum(K - S, 0.0)
         
-        # Základní výpočty
-        d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * np.sqrt(T))
-        d2 = d1 - sigma * np.sqrt(T)
+        sqrt_T = _sqrt(T)
+        exp_rT = _exp(-r * T)
+        vol_T = sigma * sqrt_T
         
-        # PDF a CDF
-        pdf_d1 = stats.norm.pdf(d1)
+        # Limita σ√T → 0 stejně jako ve skalární verzi
+        if vol_T < _MIN_VOL_TIME:
+            if option_type == 'call':
+                return np.maximum(S - K * exp_rT, 0.0)
+            else:
+                return np.maximum(K * exp_rT - S, 0.0)
         
-        if is_call:
-            cdf_d1 = stats.norm.cdf(d1)
-            cdf_d2 = stats.norm.cdf(d2)
-            
-            # Delta
-            delta = cdf_d1
-            
-            # Theta (roční, převedeme na denní)
-            theta = -(S * pdf_d1 * sigma / (2 * np.sqrt(T)) + 
-                     r * K * np.exp(-r * T) * cdf_d2) / 365
+        d1 = (_log(S / K) + (r + 0.5 * sigma ** 2) * T) / vol_T
+        d2 = d1 - vol_T
+        
+        if option_type == 'call':
+            return S * _ndtr(d1) - K * exp_rT * _ndtr(d2)
+        else:
+            return K * exp_rT * _ndtr(-d2) - S * _ndtr(-d1)
+    
+    def evaluate_strike_batch(self, S_entry, S_target, K_arr, T, r, sigma, is_call=True,
+                              T_target=None, dte=None):
+        """
+        Fúzované ohodnocení pole strikes pro výběr opce
+        Vstupní cena, hodnota při targetu, break-even a pravděpodobnost profitu
+        v jednom průchodu se sdíleným log(K), σ√T a drift členem
+        """
+        K = np.asarray(K_arr, dtype=np.float64)
+        option_type = 'call' if is_call else 'put'
+        
+        if T_target is None:
+            T_target = T * 0.5  # Target předpokládáme v polovině času
+        if dte is None:
+            dte = T * 365
+        
+        sigma_sqrtT = sigma * _sqrt(T)
+        sigma_sqrtT_target = sigma * _sqrt(T_target)
+        half_var = 0.5 * sigma * sigma
+        
+        if T_target <= 0 or min(sigma_sqrtT, sigma_sqrtT_target) < _MIN_VOL_TIME:
+            # Degenerované případy řeší black_scholes_vec (limita σ√T → 0)
+            entry_prices = self.black_scholes_vec(S_entry, K, T, r, sigma, option_type)
+            target_values = self.black_scholes_vec(S_target, K, T_target, r, sigma, option_type)
         else:
-            cdf_minus_d1 = stats.norm.cdf(-d1)
-            cdf_minus_d2 = stats.norm.cdf(-d2)
+            # Znaménko místo větve: call = S·N(d1) - K·e^(-rT)·N(d2),
+            # put = -(S·N(-d1) - K·e^(-rT)·N(-d2))
+            sign = 1.0 if is_call else -1.0
+            log_K = _log(K)
             
-            # Delta
-            delta = -cdf_minus_d1
+            d1_entry = (_log(S_entry) - log_K + (r + half_var) * T) / sigma_sqrtT
+            d1_target = (_log(S_target) - log_K + (r + half_var) * T_target) / sigma_sqrtT_target
             
-            # Theta
-            theta = -(S * pdf_d1 * sigma / (2 * np.sqrt(T)) - 
-                     r * K * np.exp(-r * T) * cdf_minus_d2) / 365
-        
-        # Gamma (stejné pro call i put)
-        gamma = pdf_d1 / (S * sigma * np.sqrt(T))
+            entry_prices = sign * (S_entry * _ndtr(sign * d1_entry) -
+                                   K * _exp(-r * T) * _ndtr(sign * (d1_entry - sigma_sqrtT)))
+            target_values = sign * (S_target * _ndtr(sign * d1_target) -
+                                    K * _exp(-r * T_target) * _ndtr(sign * (d1_target - sigma_sqrtT_target)))
+        
+        breakevens = self.calculate_breakeven(K, entry_prices, is_call)
+        
+        # Pravděpodobnost profitu (log-normální), pro dte == T*365 sdílí σ√T s oceněním
+        with np.errstate(invalid='ignore', divide='ignore'):
+            log_ratio = _log(breakevens / S_entry)
+        
+        if dte > 0:
+            t = dte / 365
+            diffusion = sigma_sqrtT if t == T else sigma * _sqrt(t)
+            z_score = (log_ratio - (r - half_var) * t) / diffusion
+            probabilities = _ndtr(-z_score if is_call else z_score)
+        else:
+            probabilities = ((log_ratio < 0) if is_call else (log_ratio > 0)).astype(np.float64)
         
-        # Vega (na 1% změnu IV)
-        vega = S * pdf_d1 * np.sqrt(T) / 100
+        return {
+            'entry_prices': entry_prices,
+            'target_values': target_values,
+            'breakevens': breakevens,
+            'probabilities': probabilities
+        }
+    
+    def calculate_greeks(self, spot, strike, dte, iv, is_call=True):
+        """
+        Vypočítá všechny Greeks s vysokou přesností
+        """
+        T = max(dte / 365, 0.001)  # Čas v letech
         
-        # Rho (na 1% změnu úrokové sazby)
-        if is_call:
-            rho = K * T * np.exp(-r * T) * stats.norm.cdf(d2) / 100
-        else:
-            rho = -K * T * np.exp(-r * T) * stats.norm.cdf(-d2) / 100
+        delta, gamma, theta, vega, rho, price = _bs_greeks(
+            float(spot), float(strike), T, self.risk_free_rate, float(iv), bool(is_call)
+        )
         
         return {
             'delta': delta,
@@ -162,7 +315,8 @@ class OptionsCalculator:
             'theta': theta,
             'vega': vega,
             'rho': rho,
-            'lambda': delta * S / self.black_scholes(S, K, T, r, sigma, 'call' if is_call else 'put')
+            # Cena může podtéct na 0 (deep OTM, nulová IV, limita σ√T → 0)
+            'lambda': delta * spot / price if price > 0 else float('nan')
         }
     
     def calculate_implied_volatility(self, option_price, S, K, T, r, option_type='call'):
@@ -172,9 +326,13 @@ class OptionsCalculator:
         # Počáteční odhad
         sigma = 0.2
         
+        # Lokální reference, aby smyčka neopakovala attribute lookup
+        black_scholes = self.black_scholes
+        vega_for_iv = self.calculate_vega_for_iv
+        
         for _ in range(100):  # Max 100 iterací
-            price = self.black_scholes(S, K, T, r, sigma, option_type)
-            vega = self.calculate_vega_for_iv(S, K, T, r, sigma)
+            price = black_scholes(S, K, T, r, sigma, option_type)
+            vega = vega_for_iv(S, K, T, r, sigma)
             
             price_diff = option_price - price
             
@@ -189,81 +347,177 @@ class OptionsCalculator:
         
         return sigma
     
+    def calculate_implied_volatility_vec(self, option_prices, S, K_arr, T, r, is_call_arr=True):
+        """
+        Vektorizovaný Newton-Raphson pro IV celého option chainu najednou
+        """
+        option_prices = np.asarray(option_prices, dtype=np.float64)
+        K = np.asarray(K_arr, dtype=np.float64)
+        is_call = np.broadcast_to(np.asarray(is_call_arr, dtype=bool), K.shape)
+        
+        # Veličiny nezávislé na sigma
+        sqrt_T = _sqrt(T)
+        exp_rT = _exp(-r * T)
+        log_SK = _log(S / K)
+        
+        # Počáteční odhad a maska opcí, které ještě nekonvergovaly
+        sigma = np.full(K.shape, 0.2)
+        active = np.ones(K.shape, dtype=bool)
+        
+        for _ in range(100):  # Max 100 iterací
+            sigma_sqrt_T = sigma * sqrt_T
+            d1 = (log_SK + (r + 0.5 * sigma ** 2) * T) / sigma_sqrt_T
+            d2 = d1 - sigma_sqrt_T
+            
+            call_price = S * _ndtr(d1) - K * exp_rT * _ndtr(d2)
+            put_price = K * exp_rT * _ndtr(-d2) - S * _ndtr(-d1)
+            price = np.where(is_call, call_price, put_price)
+            vega = S * _INV_SQRT_2PI * _exp(-0.5 * d1 * d1) * sqrt_T
+            
+            price_diff = option_prices - price
+            
+            # Konvergence
+            active &= np.abs(price_diff) >= 0.001
+            if not active.any():
+                break
+            
+            # Newton-Raphson update jen pro aktivní opce s použitelnou vegou
+            update = active & (vega > 0.0001)
+            step = np.divide(price_diff, vega, out=np.zeros_like(vega), where=update)
+            sigma = np.clip(sigma + step, 0.001, 5.0)  # Keep IV in reasonable bounds
+        
+        return sigma
+    
     def calculate_vega_for_iv(self, S, K, T, r, sigma):
         """
         Helper pro IV kalkulaci
         """
-        d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * np.sqrt(T))
-        return S * stats.norm.pdf(d1) * np.sqrt(T)
+        sqrt_T = _sqrt(T)
+        d1 = (_log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * sqrt_T)
+        return S * _INV_SQRT_2PI * _exp(-0.5 * d1 * d1) * sqrt_T
     
     def calculate_option_pl(self, spot_price, strike, premium, contracts, is_call=True):
         """
         Vypočítá P/L pro danou cenu při expiraci
+        Skalární obal nad calculate_option_pl_vec, aby oba tvary počítaly stejně
+        """
+        # P/L = (intrinsic value - premium paid) * contracts * multiplier
+        return float(self.calculate_option_pl_vec(spot_price, strike, premium, contracts, is_call))
+
+    def calculate_option_pl_vec(self, spot_prices, strike, premium, contracts, is_call=True):
+        """
+        Vektorizovaný P/L při expiraci pro celé pole cen podkladu
         """
+        S = np.asarray(spot_prices)
+        if S.dtype.kind != 'f':
+            S = S.astype(np.float64)
+
+        # Skaláry v dtype pole, aby float32 vstup zůstal float32
+        strike = S.dtype.type(strike)
+        premium = S.dtype.type(premium)
+
+        # Jediná větev mimo výpočet, zbytek je čistá kompozice ufunc
         if is_call:
-            intrinsic_value = max(spot_price - strike, 0)
+            intrinsic_value = np.maximum(S - strike, 0)
         else:
-            intrinsic_value = max(strike - spot_price, 0)
-        
-        # P/L = (intrinsic value - premium paid) * contracts * multiplier
-        pl = (intrinsic_value - premium) * contracts * 100
-        
-        return pl
-    
+            intrinsic_value = np.maximum(strike - S, 0)
+
+        return (intrinsic_value - premium) * (contracts * 100)
+
     def calculate_probability_of_profit(self, current_price, break_even, dte, iv, is_bullish=True):
         """
         Vypočítá pravděpodobnost profitu pomocí log-normální distribuce
         """
+        return float(_exp(self.log_probability_of_profit(current_price, break_even, dte, iv, is_bullish)))
+    
+    def log_probability_of_profit(self, current_price, break_even, dte, iv, is_bullish=True):
+        """
+        Logaritmus pravděpodobnosti profitu (stabilní i v extrémních chvostech)
+        Vhodné pro skládání pravděpodobností více nohou strategie sčítáním
+        """
         if dte <= 0:
-            return 1.0 if ((is_bullish and current_price > break_even) or 
-                          (not is_bullish and current_price < break_even)) else 0.0
+            return 0.0 if ((is_bullish and current_price > break_even) or 
+                          (not is_bullish and current_price < break_even)) else -np.inf
         
         # Parametry log-normální distribuce
         time_to_expiry = dte / 365
-        drift = (self.risk_free_rate - 0.5 * iv ** 2) * time_to_expiry
-        diffusion = iv * np.sqrt(time_to_expiry)
+        r = self.risk_free_rate
+        drift = (r - 0.5 * iv ** 2) * time_to_expiry
+        diffusion = iv * _sqrt(time_to_expiry)
         
         # Z-score pro break-even
-        z_score = (np.log(break_even / current_price) - drift) / diffusion
+        z_score = (_log(break_even / current_price) - drift) / diffusion
         
-        # Pravděpodobnost
-        if is_bullish:
-            probability = 1 - stats.norm.cdf(z_score)
-        else:
-            probability = stats.norm.cdf(z_score)
+        # Bullish P(S_T > BE) = ndtr(-z), bearish ndtr(z)
+        return _log_ndtr(-z_score if is_bullish else z_score)
+    
+    def calculate_probability_of_profit_vec(self, current_price, break_even, dte, iv, is_bullish=True):
+        """
+        Vektorizovaná pravděpodobnost profitu (break-even, DTE, IV i směr mohou být pole)
+        """
+        break_even = np.asarray(break_even, dtype=np.float64)
+        dte = np.asarray(dte, dtype=np.float64)
+        iv = np.asarray(iv, dtype=np.float64)
+        r = self.risk_free_rate
         
-        return max(0, min(1, probability))
+        # Parametry log-normální distribuce (expirované opce řeší np.where níže)
+        time_to_expiry = np.maximum(dte, 1e-9) / 365
+        drift = (r - 0.5 * iv * iv) * time_to_expiry
+        diffusion = iv * _sqrt(time_to_expiry)
+        
+        # Z-score pro break-even (záporný break-even dává NaN)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            log_ratio = _log(break_even / current_price)
+        z_score = (log_ratio - drift) / diffusion
+        
+        # Znaménko místo větve: bullish P(S_T > BE) = ndtr(-z), bearish ndtr(z)
+        sign = np.where(is_bullish, -1.0, 1.0)
+        probability = np.where(
+            dte > 0,
+            _ndtr(sign * z_score),
+            (sign * log_ratio > 0).astype(np.float64)
+        )
+        
+        # ndtr je omezené na [0, 1] samo, clip není potřeba
+        return probability
     
     def monte_carlo_simulation(self, S, K, T, r, sigma, option_type='call', num_simulations=10000):
         """
         Monte Carlo simulace pro exotické opce nebo složitější strategie
         """
-        # Generování náhodných cest
-        np.random.seed(42)  # Pro reprodukovatelnost
-        
-        # Parametry
-        dt = T / 252  # Denní kroky
-        num_steps = int(T * 252)
-        
-        # Simulace cen
-        prices = np.zeros((num_simulations, num_steps + 1))
-        prices[:, 0] = S
-        
-        for t in range(1, num_steps + 1):
-            z = np.random.standard_normal(num_simulations)
-            prices[:, t] = prices[:, t-1] * np.exp((r - 0.5 * sigma**2) * dt + sigma * np.sqrt(dt) * z)
-        
-        # Výplata při expiraci
+        # scipy.stats je těžký import, potřebujeme ho jen tady
+        from scipy.stats import qmc
+        
+        # Sobol vyžaduje mocninu 2 -> největší počet párů, který se vejde do num_simulations
+        # (alespoň 2 páry, jinak by výběrová směrodatná odchylka s ddof=1 byla NaN)
+        log2_pairs = int(np.log2(max(num_simulations // 2, 2)))
+        num_pairs = 2 ** log2_pairs
+        
+        # Quasi-random normály ze Sobolovy sekvence + antitetické páry (Z, -Z)
+        sobol = qmc.Sobol(d=1, scramble=True, seed=42)  # Pro reprodukovatelnost
+        # float32 stačí (std. chyba ~1e-3 ceny) a půlí paměť terminálních cen
+        f32 = np.float32
+        z = _ndtri(sobol.random_base2(log2_pairs)[:, 0]).astype(f32)
+        
+        # Pro evropskou opci stačí terminální cena GBM v uzavřeném tvaru,
+        # S_T = S * exp((r - 0.5σ²)T + σ√T·Z), bez simulace celé cesty
+        drift = f32((r - 0.5 * sigma * sigma) * T)
+        vol = f32(sigma * _sqrt(T))
+        S, K = f32(S), f32(K)
+        terminal_up = S * _exp(drift + vol * z)
+        terminal_down = S * _exp(drift - vol * z)
+        
+        # Výplata při expiraci, zprůměrovaná přes antitetický pár
         if option_type == 'call':
-            payoffs = np.maximum(prices[:, -1] - K, 0)
+            pair_payoffs = 0.5 * (np.maximum(terminal_up - K, 0) + np.maximum(terminal_down - K, 0))
         else:
-            payoffs = np.maximum(K - prices[:, -1], 0)
+            pair_payoffs = 0.5 * (np.maximum(K - terminal_up, 0) + np.maximum(K - terminal_down, 0))
         
-        # Průměrná diskontovaná hodnota
-        option_price = np.exp(-r * T) * np.mean(payoffs)
+        # Průměrná diskontovaná hodnota (akumulace ve float64)
+        option_price = float(_exp(-r * T) * pair_payoffs.mean(dtype=np.float64))
         
-        # Confidence interval
-        std_error = np.std(payoffs) / np.sqrt(num_simulations)
+        # Confidence interval (páry jsou nezávislé vzorky, jednotlivé cesty ne)
+        std_error = float(pair_payoffs.std(ddof=1, dtype=np.float64) / _sqrt(num_pairs))
         confidence_interval = [option_price - 1.96 * std_error, option_price + 1.96 * std_error]
         
         return {
@@ -124,3 +124,13 @@ STANDARD_STRIKES = {
     'UNDER_500': 5.0,
     'OVER_500': 10.0,
 }
+
+# Pevný krok strikes pro známé instrumenty (ostatní podle STANDARD_STRIKES)
+STRIKE_INCREMENTS = {
+    'SPX': 5.0,
+    'SPXW': 5.0,
+    'ES': 5.0,
+    'SPY': 1.0,
+    'XSP': 1.0,
+    'QQQ': 1.0,
+}
@@ -4,7 +4,9 @@ import numpy as np
 from datetime import datetime, timedelta
 import requests
 import time
-from typing import Dict, Optional, List, Tuple
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, List, Tuple
 
 class MarketDataFetcher:
     """
@@ -28,9 +30,19 @@ class MarketDataFetcher:
         self.cache_timestamp = {}
         self.cache_ttl = 30  # seconds
         
+        # Expirace převedené na datetime64 (klíč: symbol -> (expirace, pole dat))
+        self._parsed_expirations = {}
+        
         # Rate limiting
         self.last_request_time = 0
         self.min_request_interval = 0.5  # seconds
+        
+        # Sdílený thread pool pro souběžné stahování (přežívá reruny přes cache_resource)
+        self._executor = ThreadPoolExecutor(max_workers=len(self.symbols))
+        
+        # Probíhající stahování (klíč cache -> Future), souběžné missy sdílí jeden request
+        self._inflight = {}
+        self._lock = threading.Lock()
     
     def _rate_limit(self):
         """Implementuje rate limiting"""
@@ -46,37 +58,70 @@ class MarketDataFetcher:
             return False
         return (time.time() - self.cache_timestamp[key]) < self.cache_ttl
     
+    def _coalesced(self, cache_key: str, fetch: Callable[[], Optional[object]]):
+        """
+        Vrátí hodnotu z cache, nebo počká na již běžící stahování stejného klíče,
+        jinak stáhne sám a výsledek předá všem čekajícím vláknům
+        """
+        with self._lock:
+            if self._is_cache_valid(cache_key):
+                return self.cache[cache_key]
+            
+            future = self._inflight.get(cache_key)
+            is_owner = future is None
+            
+            if is_owner:
+                future = Future()
+                self._inflight[cache_key] = future
+        
+        if not is_owner:
+            return future.result()
+        
+        try:
+            result = fetch()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(cache_key, None)
+    
     def get_current_price(self, symbol: str) -> Optional[float]:
         """
         Získá aktuální cenu symbolu s error handling
         """
-        cache_key = f"price_{symbol}"
+        def fetch():
+            self._rate_limit()
+            return self._fetch_price(symbol)
         
-        # Check cache
-        if self._is_cache_valid(cache_key):
-            return self.cache[cache_key]
+        return self._coalesced(f"price_{symbol}", fetch)
+    
+    def _fetch_price_coalesced(self, symbol: str) -> Optional[float]:
+        """
+        Stáhne cenu přes _coalesced bez rate limitu (fallback z thread poolu),
+        souběžné reruny tak sdílí jeden request na symbol
+        """
+        return self._coalesced(f"price_{symbol}", lambda: self._fetch_price(symbol))
+    
+    def _fetch_price(self, symbol: str) -> Optional[float]:
+        """
+        Stáhne cenu symbolu bez cache a rate limitu (volá se i z thread poolu)
+        """
+        cache_key = f"price_{symbol}"
         
         try:
-            self._rate_limit()
             ticker = yf.Ticker(symbol)
             
-            # Zkusit různé metody pro získání ceny
             try:
-                # Metoda 1: Fast info
-                info = ticker.fast_info
-                price = info['lastPrice']
-            except:
-                try:
-                    # Metoda 2: History
-                    hist = ticker.history(period='1d', interval='1m')
-                    if not hist.empty:
-                        price = float(hist['Close'].iloc[-1])
-                    else:
-                        # Metoda 3: Info
-                        info = ticker.info
-                        price = info.get('regularMarketPrice', info.get('previousClose', 0))
-                except:
-                    return None
+                price = self._fetch_fast_info(ticker)
+            except Exception:
+                # fast_info nemusí mít lastPrice (např. ^XSP, DX-Y.NYB) -> historie pro tento symbol
+                price = self._fetch_history(ticker)
+            
+            if price is None:
+                return None
             
             # Cache the result
             self.cache[cache_key] = price
@@ -88,15 +133,88 @@ class MarketDataFetcher:
             print(f"Error fetching {symbol}: {str(e)}")
             return None
     
+    def _fetch_fast_info(self, ticker: yf.Ticker) -> Optional[float]:
+        """
+        Poslední cena z fast_info (rychlá cesta)
+        """
+        return float(ticker.fast_info['lastPrice'])
+    
+    def _fetch_history(self, ticker: yf.Ticker) -> Optional[float]:
+        """
+        Poslední cena z minutové historie, případně z info (záloha, když fast_info selže)
+        """
+        hist = ticker.history(period='1d', interval='1m')
+        if not hist.empty:
+            return float(hist['Close'].iloc[-1])
+        
+        info = ticker.info
+        return info.get('regularMarketPrice', info.get('previousClose'))
+    
+    def _download_prices(self, symbols: List[str]) -> Dict[str, float]:
+        """
+        Stáhne poslední ceny více symbolů jedním yf.download voláním
+        """
+        try:
+            hist = yf.download(symbols, period='1d', interval='1m', group_by='ticker',
+                               progress=False, threads=True)
+        except Exception as e:
+            print(f"Error downloading prices: {str(e)}")
+            return {}
+        
+        prices = {}
+        
+        for symbol in symbols:
+            try:
+                closes = hist[symbol]['Close'].dropna()
+            except KeyError:
+                continue
+            
+            if closes.empty:
+                continue
+            
+            price = float(closes.iloc[-1])
+            
+            # Cache the result
+            self.cache[f"price_{symbol}"] = price
+            self.cache_timestamp[f"price_{symbol}"] = time.time()
+            
+            prices[symbol] = price
+        
+        return prices
+    
+    def _download_batch(self, symbols: List[str]) -> Dict[str, float]:
+        """Dávkové stažení cen s rate limitem (volá se přes _coalesced)"""
+        self._rate_limit()
+        return self._download_prices(symbols)
+    
     def get_all_prices(self) -> Dict[str, float]:
         """
         Získá ceny všech sledovaných instrumentů
-        Optimalizováno pro rychlost
+        Symboly mimo cache se stahují jedním yf.download voláním
         """
+        symbol_prices = {}
+        missing = []
+        
+        for symbol in self.symbols.values():
+            if self._is_cache_valid(f"price_{symbol}"):
+                symbol_prices[symbol] = self.cache[f"price_{symbol}"]
+            else:
+                missing.append(symbol)
+        
+        if missing:
+            # Jeden rate limit a jeden batch request pro všechny symboly,
+            # souběžné reruny počkají na již běžící dávku
+            symbol_prices.update(self._coalesced("prices_batch", lambda: self._download_batch(missing)))
+            
+            # Fallback po jednotlivých symbolech (paralelně) pro to, co v dávce chybí
+            fallback = [symbol for symbol in missing if not symbol_prices.get(symbol)]
+            if fallback:
+                symbol_prices.update(zip(fallback, self._executor.map(self._fetch_price_coalesced, fallback)))
+        
         prices = {}
         
         for name, symbol in self.symbols.items():
-            price = self.get_current_price(symbol)
+            price = symbol_prices.get(symbol)
             if price:
                 prices[name] = price
             elif name == 'XSP' and 'SPY' in prices:
@@ -105,40 +223,72 @@ class MarketDataFetcher:
         
         return prices
     
-    def get_option_chain(self, symbol: str, expiry_date: Optional[str] = None) -> Optional[Dict]:
+    def _get_expirations(self, ticker: yf.Ticker, symbol: str) -> Tuple[str, ...]:
         """
-        Získá kompletní option chain
+        Vrátí seznam expirací symbolu (cachovaný, mění se řádově po hodinách)
         """
-        cache_key = f"chain_{symbol}_{expiry_date}"
+        cache_key = f"expirations_{symbol}"
         
         if self._is_cache_valid(cache_key):
             return self.cache[cache_key]
         
+        expirations = tuple(ticker.options)
+        
+        if expirations:
+            self.cache[cache_key] = expirations
+            self.cache_timestamp[cache_key] = time.time()
+        
+        return expirations
+    
+    def _expiration_dates(self, symbol: str, expirations: Tuple[str, ...]) -> np.ndarray:
+        """
+        Vrátí expirace jako pole datetime64[D], parsuje jen při změně seznamu
+        """
+        cached = self._parsed_expirations.get(symbol)
+        
+        if cached is None or cached[0] != expirations:
+            cached = (expirations, np.array(expirations, dtype='datetime64[D]'))
+            self._parsed_expirations[symbol] = cached
+        
+        return cached[1]
+    
+    def get_option_chain(self, symbol: str, expiry_date: Optional[str] = None,
+                         ticker: Optional[yf.Ticker] = None) -> Optional[Dict]:
+        """
+        Získá kompletní option chain
+        Volající může předat už vytvořený yf.Ticker, aby se nestahoval znovu
+        """
+        return self._coalesced(
+            f"chain_{symbol}_{expiry_date}",
+            lambda: self._fetch_option_chain(symbol, expiry_date, ticker)
+        )
+    
+    def _fetch_option_chain(self, symbol: str, expiry_date: Optional[str],
+                            ticker: Optional[yf.Ticker]) -> Optional[Dict]:
+        """
+        Stáhne option chain bez kontroly cache (volá se přes _coalesced)
+        """
+        cache_key = f"chain_{symbol}_{expiry_date}"
+        
         try:
             self._rate_limit()
-            ticker = yf.Ticker(symbol)
+            if ticker is None:
+                ticker = yf.Ticker(symbol)
             
             # Získat seznam expirací
-            expirations = ticker.options
+            expirations = self._get_expirations(ticker, symbol)
             
             if not expirations:
                 return None
             
             # Vybrat expiraci
             if expiry_date is None:
-                # Najít nejbližší expiraci
-                today = datetime.now().date()
-                
-                # Pro 0DTE
-                for exp in expirations:
-                    exp_date = datetime.strptime(exp, '%Y-%m-%d').date()
-                    if exp_date == today:
-                        expiry_date = exp
-                        break
+                # Pro 0DTE (expirace parsované najednou a cachované per symbol)
+                dates = self._expiration_dates(symbol, expirations)
+                is_today = dates == np.datetime64(datetime.now().date(), 'D')
                 
                 # Pokud není 0DTE, vezmi nejbližší
-                if expiry_date is None:
-                    expiry_date = expirations[0]
+                expiry_date = expirations[int(np.argmax(is_today))] if is_today.any() else expirations[0]
             
             # Získat option chain
             opt_chain = ticker.option_chain(expiry_date)
@@ -147,7 +297,12 @@ class MarketDataFetcher:
                 'calls': opt_chain.calls,
                 'puts': opt_chain.puts,
                 'expiry': expiry_date,
-                'underlying_price': self.get_current_price(symbol)
+                'underlying_price': self.get_current_price(symbol),
+                # NumPy pohledy pro rychlé lookupy podle strike
+                'arrays': {
+                    'calls': self._chain_arrays(opt_chain.calls),
+                    'puts': self._chain_arrays(opt_chain.puts)
+                }
             }
             
             # Cache
@@ -168,29 +323,20 @@ class MarketDataFetcher:
             # Vypočítat target datum
             target_date = datetime.now().date() + timedelta(days=dte)
             
-            # Získat dostupné expirace
-            ticker = yf.Ticker(self.symbols.get(symbol, symbol))
-            expirations = ticker.options
+            # Získat dostupné expirace (ticker se předá dál do get_option_chain)
+            yf_symbol = self.symbols.get(symbol, symbol)
+            ticker = yf.Ticker(yf_symbol)
+            expirations = self._get_expirations(ticker, yf_symbol)
             
-            # Najít nejbližší expiraci
-            best_expiry = None
-            min_diff = float('inf')
-            
-            for exp_str in expirations:
-                exp_date = datetime.strptime(exp_str, '%Y-%m-%d').date()
-                diff = abs((exp_date - target_date).days)
-                
-                if diff < min_diff:
-                    min_diff = diff
-                    best_expiry = exp_str
-                
-                if diff == 0:  # Přesná shoda
-                    break
+            if not expirations:
+                return None
             
-            if best_expiry:
-                return self.get_option_chain(self.symbols.get(symbol, symbol), best_expiry)
+            # Najít nejbližší expiraci (při shodě vyhrává dřívější)
+            dates = self._expiration_dates(yf_symbol, expirations)
+            idx = int(np.argmin(np.abs(dates - np.datetime64(target_date, 'D'))))
+            best_expiry = expirations[idx]
             
-            return None
+            return self.get_option_chain(yf_symbol, best_expiry, ticker=ticker)
             
         except Exception as e:
             print(f"Error in get_option_chain_live: {str(e)}")
@@ -206,28 +352,38 @@ class MarketDataFetcher:
         if not chain:
             return None
         
-        df = chain['calls'] if option_type == 'call' else chain['puts']
+        arrays = chain['arrays']['calls' if option_type == 'call' else 'puts']
+        strikes = arrays['strike']
         
-        # Najít řádek se strike
-        strike_row = df[df['strike'] == strike]
+        if strikes.size == 0:
+            return None
         
-        if strike_row.empty:
-            # Zkusit najít nejbližší strike
-            closest_idx = (df['strike'] - strike).abs().idxmin()
-            strike_row = df.loc[[closest_idx]]
+        # Binární vyhledání strike (chain je seřazený), při neshodě nejbližší strike
+        idx = int(np.searchsorted(strikes, strike))
+        if idx == strikes.size or (idx > 0 and strike - strikes[idx - 1] <= strikes[idx] - strike):
+            idx -= 1
         
-        if not strike_row.empty:
-            bid = strike_row['bid'].iloc[0]
-            ask = strike_row['ask'].iloc[0]
-            
-            # Vypočítat mid price
-            if pd.notna(bid) and pd.notna(ask) and bid > 0 and ask > 0:
-                return (bid + ask) / 2
-            elif pd.notna(strike_row['lastPrice'].iloc[0]):
-                return strike_row['lastPrice'].iloc[0]
+        bid = arrays['bid'][idx]
+        ask = arrays['ask'][idx]
+        last_price = arrays['lastPrice'][idx]
+        
+        # Vypočítat mid price
+        if not np.isnan(bid) and not np.isnan(ask) and bid > 0 and ask > 0:
+            return (bid + ask) / 2
+        elif not np.isnan(last_price):
+            return last_price
         
         return None
     
+    def _chain_arrays(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        Převede sloupce option chainu potřebné pro pricing na NumPy pole
+        """
+        return {
+            column: df[column].to_numpy(dtype=np.float64)
+            for column in ('strike', 'bid', 'ask', 'lastPrice')
+        }
+    
     def get_historical_volatility(self, symbol: str, period: int = 20) -> float:
         """
         Vypočítá historickou volatilitu (HV)
@@ -247,17 +403,18 @@ class MarketDataFetcher:
             if len(hist) < period:
                 return 0.20  # Default 20% volatility
             
-            # Vypočítat log returns
-            hist['log_return'] = np.log(hist['Close'] / hist['Close'].shift(1))
+            # Vypočítat log returns přímo nad NumPy polem (bez pandas alignmentu)
+            closes = hist['Close'].to_numpy(dtype=np.float64)
+            returns = np.diff(np.log(closes))
             
             # Odstranit NaN
-            returns = hist['log_return'].dropna()
+            returns = returns[~np.isnan(returns)]
             
-            if len(returns) < period:
+            if returns.size < period:
                 return 0.20
             
             # Vypočítat volatilitu (anualizovanou)
-            daily_vol = returns.tail(period).std()
+            daily_vol = returns[-period:].std(ddof=1)
             annual_vol = daily_vol * np.sqrt(252)
             
             # Cache
@@ -1,7 +1,7 @@
 import numpy as np
 from typing import Dict, Optional, List, Tuple
 from calculator import OptionsCalculator
-from scipy.optimize import minimize_scalar
+from config import STRIKE_INCREMENTS
 import pandas as pd
 
 class OptionFinder:
@@ -28,163 +28,186 @@ class OptionFinder:
         T = max(dte / 365, 1/365/24)  # Minimálně 1 hodina pro 0DTE
         
         # Určit rozsah strikes k analýze
-        strikes = self._generate_strike_candidates(current_price, target, stop, is_call)
-        
-        best_option = None
-        best_score = -float('inf')
-        
-        for strike in strikes:
-            # Vypočítat cenu opce při vstupu
-            option_price = self.calculator.black_scholes(
-                S=entry,
-                K=strike,
-                T=T,
-                r=self.calculator.risk_free_rate,
-                sigma=iv,
-                option_type='call' if is_call else 'put'
-            )
-            
-            if option_price <= 0 or option_price * 100 > risk_amount:
-                continue
-            
-            # Počet kontraktů
-            contracts = min(
-                int(risk_amount / (option_price * 100)),
-                self.max_contracts
-            )
-            
-            if contracts == 0:
-                continue
-            
-            # Skutečný risk
-            actual_risk = contracts * option_price * 100
-            
-            # Vypočítat hodnotu při targetu
-            target_value = self.calculator.black_scholes(
-                S=target,
-                K=strike,
-                T=T * 0.5,  # Předpokládáme dosažení v polovině času
-                r=self.calculator.risk_free_rate,
-                sigma=iv,
-                option_type='call' if is_call else 'put'
-            )
-            
-            # Potenciální profit
-            max_profit = contracts * (target_value - option_price) * 100
-            
-            # Break-even
-            breakeven = self.calculator.calculate_breakeven(strike, option_price, is_call)
-            
-            # Pravděpodobnost úspěchu
-            probability = self.calculator.calculate_probability_of_profit(
-                current_price=entry,
-                break_even=breakeven,
-                dte=dte,
-                iv=iv,
-                is_bullish=is_call
-            )
-            
-            # Score = (profit/risk * probability) - distance penalty
-            if actual_risk > 0 and probability >= self.min_probability:
-                rrr = max_profit / actual_risk
-                distance_penalty = abs(strike - entry) / entry * 10  # Penalizace vzdálených strikes
-                score = (rrr * probability) - distance_penalty
-                
-                if score > best_score:
-                    best_score = score
-                    best_option = {
-                        'found': True,
-                        'strike': strike,
-                        'entry_price': round(option_price, 2),
-                        'target_price': round(target_value, 2),
-                        'contracts': contracts,
-                        'total_risk': round(actual_risk, 0),
-                        'max_profit': round(max_profit, 0),
-                        'breakeven': round(breakeven, 2),
-                        'probability': probability,
-                        'rrr': round(rrr, 1),
-                        'score': score,
-                        'prob_loss': 1 - probability
-                    }
-        
-        if best_option is None:
+        strikes = self._generate_strike_candidates(current_price, target, stop, is_call, instrument)
+        
+        K = np.asarray(strikes, dtype=np.float64)
+        r = self.calculator.risk_free_rate
+        
+        # Dolní mez ceny opce (S - K·e^(-rT) pro call, K·e^(-rT) - S pro put): strikes,
+        # které nejsou dostupné ani za ni, se vůbec neoceňují (typicky deep ITM)
+        K_disc = K * np.exp(-r * T)
+        lower_bounds = np.maximum(entry - K_disc, 0) if is_call else np.maximum(K_disc - entry, 0)
+        K = K[lower_bounds * 100 <= risk_amount]
+        
+        # Vstupní ceny, hodnoty při targetu (v polovině času), break-even
+        # a pravděpodobnosti pro všechny strikes v jednom fúzovaném průchodu
+        batch = self.calculator.evaluate_strike_batch(
+            S_entry=entry, S_target=target, K_arr=K, T=T, r=r, sigma=iv,
+            is_call=is_call, T_target=T * 0.5, dte=dte
+        )
+        option_prices = batch['entry_prices']
+        
+        affordable = (option_prices > 0) & (option_prices * 100 <= risk_amount)
+        if not affordable.any():
             return {'found': False, 'error': 'No suitable option found'}
         
-        return best_option
+        K = K[affordable]
+        option_prices = option_prices[affordable]
+        target_values = batch['target_values'][affordable]
+        breakevens = batch['breakevens'][affordable]
+        probabilities = batch['probabilities'][affordable]
+        
+        # Počet kontraktů a skutečný risk
+        contracts = np.minimum(np.floor(risk_amount / (option_prices * 100)), self.max_contracts)
+        actual_risk = contracts * option_prices * 100
+        
+        # Potenciální profit
+        max_profits = contracts * (target_values - option_prices) * 100
+        
+        valid = probabilities >= self.min_probability
+        if not valid.any():
+            return {'found': False, 'error': 'No suitable option found'}
+        
+        # Score = (profit/risk * probability) - distance penalty
+        rrr = max_profits / actual_risk
+        distance_penalty = np.abs(K - entry) / entry * 10  # Penalizace vzdálených strikes
+        scores = np.where(valid, rrr * probabilities - distance_penalty, -np.inf)
+        
+        best = int(np.argmax(scores))
+        probability = float(probabilities[best])
+        
+        return {
+            'found': True,
+            'strike': float(K[best]),
+            'entry_price': round(float(option_prices[best]), 2),
+            'target_price': round(float(target_values[best]), 2),
+            'contracts': int(contracts[best]),
+            'total_risk': round(float(actual_risk[best]), 0),
+            'max_profit': round(float(max_profits[best]), 0),
+            'breakeven': round(float(breakevens[best]), 2),
+            'probability': probability,
+            'rrr': round(float(rrr[best]), 1),
+            'score': float(scores[best]),
+            'prob_loss': 1 - probability
+        }
     
     def _generate_strike_candidates(self, current: float, target: float, 
-                                   stop: float, is_call: bool) -> List[float]:
+                                   stop: float, is_call: bool,
+                                   instrument: Optional[str] = None) -> List[float]:
         """
         Generuje kandidáty na strikes
+        Pro instrumenty se známým krokem (STRIKE_INCREMENTS) rovnou mřížka násobků kroku
         """
-        strikes = []
-        
         if is_call:
             # Pro call: strikes od deep ITM po mírně OTM
             start = current * 0.95  # 5% ITM
             end = target           # Do targetu
-            step = 1 if current < 100 else 5 if current < 1000 else 10
         else:
             # Pro put: strikes od mírně OTM po deep ITM
             start = target         # Od targetu
             end = current * 1.05   # 5% ITM
-            step = 1 if current < 100 else 5 if current < 1000 else 10
-        
-        # Generovat strikes
-        current_strike = start
-        while (current_strike <= end if is_call else current_strike >= end):
-            # Zaokrouhlit na nejbližší standardní strike
-            rounded = self._round_to_standard_strike(current_strike)
-            if rounded not in strikes:
-                strikes.append(rounded)
-            current_strike += step if is_call else -step
-        
-        return sorted(strikes)
+        
+        low, high = min(start, end), max(start, end)
+        
+        increment = STRIKE_INCREMENTS.get(instrument)
+        if increment is not None:
+            # Násobky kroku pokrývající rozsah, zaokrouhlovací průchod není potřeba
+            first = np.round(low / increment)
+            last = np.round(high / increment)
+            return (increment * np.arange(first, last + 1)).tolist()
+        
+        step = 1 if current < 100 else 5 if current < 1000 else 10
+        
+        # Celá mřížka najednou (počet kroků místo arange, aby nepřesahovala konec)
+        raw = low + step * np.arange(int(np.floor((high - low) / step)) + 1)
+        
+        # Zaokrouhlit na standardní strikes, np.unique zároveň deduplikuje a třídí
+        return np.unique(self._round_to_standard_strike_vec(raw)).tolist()
+    
+    def _round_to_standard_strike_vec(self, prices: np.ndarray,
+                                      instrument: Optional[str] = None) -> np.ndarray:
+        """
+        Zaokrouhlí na standardní strike price (skalár i pole, bez větvení)
+        Pro instrumenty se známým krokem (STRIKE_INCREMENTS) na násobky kroku
+        """
+        p = np.asarray(prices, dtype=np.float64)
+        
+        increment = STRIKE_INCREMENTS.get(instrument)
+        if increment is not None:
+            return np.round(p / increment) * increment
+        
+        return np.where(p < 10, np.round(p * 2) / 2,        # 0.5 increments
+               np.where(p < 100, np.round(p),               # 1.0 increments
+               np.where(p < 500, np.round(p / 5) * 5,       # 5.0 increments
+                        np.round(p / 10) * 10)))            # 10.0 increments
     
-    def _round_to_standard_strike(self, price: float) -> float:
+    def _round_to_standard_strike(self, price: float, instrument: Optional[str] = None) -> float:
         """
         Zaokrouhlí na standardní strike price
         """
-        if price < 10:
-            return round(price * 2) / 2  # 0.5 increments
-        elif price < 100:
-            return round(price)  # 1.0 increments
-        elif price < 500:
-            return round(price / 5) * 5  # 5.0 increments
-        else:
-            return round(price / 10) * 10  # 10.0 increments
+        return float(self._round_to_standard_strike_vec(price, instrument))
     
-    def find_spread_strategy(self, instrument: str, current_price: float,
-                            entry: float, target: float, risk_amount: float,
-                            is_call: bool = True, dte: int = 0, 
-                            iv: float = 0.20) -> Dict:
+    def _spread_strikes(self, entry: float, target: float, is_call: bool,
+                        instrument: Optional[str] = None) -> Tuple[float, float]:
         """
-        Najde optimální vertical spread
+        Long a short strike vertical spreadu
         """
         # Šířka spreadu
         spread_width = abs(target - entry) / 2
         
         if is_call:
-            long_strike = self._round_to_standard_strike(entry - spread_width/4)
-            short_strike = self._round_to_standard_strike(target)
+            long_strike = self._round_to_standard_strike(entry - spread_width/4, instrument)
         else:
-            long_strike = self._round_to_standard_strike(entry + spread_width/4)
-            short_strike = self._round_to_standard_strike(target)
+            long_strike = self._round_to_standard_strike(entry + spread_width/4, instrument)
         
-        T = max(dte / 365, 1/365/24)
+        return long_strike, self._round_to_standard_strike(target, instrument)
+    
+    def _butterfly_strikes(self, current_price: float, pin_target: float,
+                           instrument: Optional[str] = None) -> Tuple[float, float, float]:
+        """
+        Spodní, ATM a horní strike butterfly
+        """
+        # ATM strike (střed butterfly)
+        atm_strike = self._round_to_standard_strike(pin_target, instrument)
         
-        # Ceny opcí
-        long_premium = self.calculator.black_scholes(
-            S=entry, K=long_strike, T=T,
-            r=self.calculator.risk_free_rate,
-            sigma=iv, option_type='call' if is_call else 'put'
-        )
+        # Křídla (symetrická)
+        wing_width = current_price * 0.02  # 2% šířka křídel
+        lower_strike = self._round_to_standard_strike(atm_strike - wing_width, instrument)
+        upper_strike = self._round_to_standard_strike(atm_strike + wing_width, instrument)
         
-        short_premium = self.calculator.black_scholes(
-            S=entry, K=short_strike, T=T,
-            r=self.calculator.risk_free_rate,
+        return lower_strike, atm_strike, upper_strike
+    
+    def _price_strikes(self, S: float, strikes: List[float], T: float, iv: float,
+                       is_call: bool) -> Dict[float, float]:
+        """
+        Ocení všechny strikes jedním vektorizovaným voláním (strike -> prémie)
+        """
+        K = np.unique(np.asarray(strikes, dtype=np.float64))
+        prices = self.calculator.black_scholes_vec(
+            S=S, K=K, T=T, r=self.calculator.risk_free_rate,
             sigma=iv, option_type='call' if is_call else 'put'
         )
+        return dict(zip(K.tolist(), prices.tolist()))
+    
+    def find_spread_strategy(self, instrument: str, current_price: float,
+                            entry: float, target: float, risk_amount: float,
+                            is_call: bool = True, dte: int = 0, 
+                            iv: float = 0.20,
+                            premiums: Optional[Dict[float, float]] = None) -> Dict:
+        """
+        Najde optimální vertical spread
+        Volitelně převezme předpočítané prémie (strike -> cena při entry)
+        """
+        long_strike, short_strike = self._spread_strikes(entry, target, is_call, instrument)
+        
+        T = max(dte / 365, 1/365/24)
+        
+        # Ceny opcí
+        if premiums is None:
+            premiums = self._price_strikes(entry, [long_strike, short_strike], T, iv, is_call)
+        
+        long_premium = premiums[long_strike]
+        short_premium = premiums[short_strike]
         
         # Net debit
         net_debit = long_premium - short_premium
@@ -221,38 +244,24 @@ class OptionFinder:
     def find_butterfly_strategy(self, instrument: str, current_price: float,
                                pin_target: float, risk_amount: float,
                                is_call: bool = True, dte: int = 0,
-                               iv: float = 0.20) -> Dict:
+                               iv: float = 0.20,
+                               premiums: Optional[Dict[float, float]] = None) -> Dict:
         """
         Najde optimální butterfly spread pro "pin" strategie
+        Volitelně převezme předpočítané prémie (strike -> cena při current_price)
         """
-        # ATM strike (střed butterfly)
-        atm_strike = self._round_to_standard_strike(pin_target)
-        
-        # Křídla (symetrická)
-        wing_width = current_price * 0.02  # 2% šířka křídel
-        lower_strike = self._round_to_standard_strike(atm_strike - wing_width)
-        upper_strike = self._round_to_standard_strike(atm_strike + wing_width)
+        lower_strike, atm_strike, upper_strike = self._butterfly_strikes(current_price, pin_target, instrument)
         
         T = max(dte / 365, 1/365/24)
         
         # Vypočítat prémie
-        lower_premium = self.calculator.black_scholes(
-            S=current_price, K=lower_strike, T=T,
-            r=self.calculator.risk_free_rate,
-            sigma=iv, option_type='call' if is_call else 'put'
-        )
+        if premiums is None:
+            premiums = self._price_strikes(current_price, [lower_strike, atm_strike, upper_strike],
+                                           T, iv, is_call)
         
-        atm_premium = self.calculator.black_scholes(
-            S=current_price, K=atm_strike, T=T,
-            r=self.calculator.risk_free_rate,
-            sigma=iv, option_type='call' if is_call else 'put'
-        )
-        
-        upper_premium = self.calculator.black_scholes(
-            S=current_price, K=upper_strike, T=T,
-            r=self.calculator.risk_free_rate,
-            sigma=iv, option_type='call' if is_call else 'put'
-        )
+        lower_premium = premiums[lower_strike]
+        atm_premium = premiums[atm_strike]
+        upper_premium = premiums[upper_strike]
         
         # Net debit (long 1 lower, short 2 ATM, long 1 upper)
         net_debit = lower_premium - 2 * atm_premium + upper_premium
@@ -291,11 +300,31 @@ class OptionFinder:
     def analyze_multiple_strategies(self, **kwargs) -> pd.DataFrame:
         """
         Porovná více strategií najednou
+        Nohy spreadu a butterfly se oceňují společně, jedním voláním na každý spot
         """
         strategies = []
         
+        is_call = kwargs.get('is_call', True)
+        iv = kwargs.get('iv', 0.20)
+        T = max(kwargs.get('dte', 0) / 365, 1/365/24)
+        
+        # Spread se oceňuje při entry, butterfly při current_price
+        instrument = kwargs.get('instrument')
+        legs = {kwargs['entry']: list(self._spread_strikes(kwargs['entry'], kwargs['target'],
+                                                           is_call, instrument))}
+        if 'pin_target' in kwargs:
+            legs.setdefault(kwargs['current_price'], []).extend(
+                self._butterfly_strikes(kwargs['current_price'], kwargs['pin_target'], instrument)
+            )
+        
+        premiums = {S: self._price_strikes(S, strikes, T, iv, is_call) for S, strikes in legs.items()}
+        
+        # Každá strategie dostane jen parametry, které přijímá
+        common = {k: v for k, v in kwargs.items()
+                  if k in ('instrument', 'current_price', 'risk_amount', 'is_call', 'dte', 'iv')}
+        
         # Single option
-        single = self.find_best_strike(**kwargs)
+        single = self.find_best_strike(**{k: v for k, v in kwargs.items() if k != 'pin_target'})
         if single['found']:
             strategies.append({
                 'Strategy': 'Single Option',
@@ -307,7 +336,10 @@ class OptionFinder:
             })
         
         # Vertical spread
-        spread = self.find_spread_strategy(**kwargs)
+        spread = self.find_spread_strategy(
+            entry=kwargs['entry'], target=kwargs['target'],
+            premiums=premiums[kwargs['entry']], **common
+        )
         if spread['found']:
             strategies.append({
                 'Strategy': 'Vertical Spread',
@@ -322,7 +354,7 @@ class OptionFinder:
         if 'pin_target' in kwargs:
             butterfly = self.find_butterfly_strategy(
                 pin_target=kwargs['pin_target'],
-                **{k: v for k, v in kwargs.items() if k != 'pin_target'}
+                premiums=premiums[kwargs['current_price']], **common
             )
             if butterfly['found']:
                 strategies.append({
@@ -334,4 +366,8 @@ class OptionFinder:
                     'Contracts': butterfly['contracts']
                 })
         
-        return pd.DataFrame(strategies)
+        # Explicitní sloupce: bez odvozování z dictů a se stejnou strukturou i bez strategií
+        return pd.DataFrame.from_records(
+            strategies,
+            columns=['Strategy', 'Max Profit', 'Max Loss', 'RRR', 'Probability', 'Contracts']
+        )
@@ -1,7 +1,36 @@
-from datetime import datetime, time, timedelta
-import pytz
-from typing import Dict, Optional, Tuple
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+import time as time_module
+from zoneinfo import ZoneInfo
+from typing import Dict, Optional, Tuple, Union
 import numpy as np
+from numba import njit
+import pandas as pd
+
+# Časová zóna New York (ET)
+_ET_TZ = ZoneInfo('America/New_York')
+
+# Svátky (zjednodušená verze - v produkci použít holiday calendar)
+_HOLIDAY_DATES = frozenset({
+    date(2024, 1, 1),   # New Year's Day
+    date(2024, 1, 15),  # MLK Day
+    date(2024, 2, 19),  # Presidents Day
+    date(2024, 3, 29),  # Good Friday
+    date(2024, 5, 27),  # Memorial Day
+    date(2024, 6, 19),  # Juneteenth
+    date(2024, 7, 4),   # Independence Day
+    date(2024, 9, 2),   # Labor Day
+    date(2024, 11, 28), # Thanksgiving
+    date(2024, 12, 25), # Christmas
+})
+_HOLIDAYS_ARR = np.array(sorted(_HOLIDAY_DATES), dtype='datetime64[D]')
+
+# Regular trading hours (ET)
+_MARKET_OPEN = time(9, 30)
+_MARKET_CLOSE = time(16, 0)
+
+# Poslední stav trhu v rámci sekundového bucketu
+_status_cache = {'ts': 0, 'val': None}
 
 def format_currency(value: float, symbol: str = "$") -> str:
     """
@@ -20,14 +49,26 @@ def format_percentage(value: float, decimals: int = 1) -> str:
 def get_market_status() -> Dict:
     """
     Zjistí aktuální stav trhu (otevřený/zavřený)
+    V rámci jedné sekundy vrací kopii posledního výsledku (UI se ptá při každém rerunu)
+    """
+    now_s = int(time_module.time())
+    
+    if _status_cache['ts'] != now_s or _status_cache['val'] is None:
+        _status_cache['val'] = _compute_market_status()
+        _status_cache['ts'] = now_s
+    
+    # Kopie, aby volající nemohl změnit cachovanou hodnotu
+    return dict(_status_cache['val'])
+
+def _compute_market_status() -> Dict:
+    """
+    Výpočet stavu trhu bez cache
     """
-    # Časová zóna New York (ET)
-    et_tz = pytz.timezone('America/New_York')
-    now_et = datetime.now(et_tz)
+    now_et = datetime.now(_ET_TZ)
     
     # Market hours
-    market_open = time(9, 30)
-    market_close = time(16, 0)
+    market_open = _MARKET_OPEN
+    market_close = _MARKET_CLOSE
     
     # Pre-market a after-hours
     premarket_open = time(4, 0)
@@ -36,21 +77,7 @@ def get_market_status() -> Dict:
     current_time = now_et.time()
     is_weekday = now_et.weekday() < 5  # Monday = 0, Friday = 4
     
-    # Svátky (zjednodušená verze - v produkci použít holiday calendar)
-    holidays = [
-        datetime(2024, 1, 1),   # New Year's Day
-        datetime(2024, 1, 15),  # MLK Day
-        datetime(2024, 2, 19),  # Presidents Day
-        datetime(2024, 3, 29),  # Good Friday
-        datetime(2024, 5, 27),  # Memorial Day
-        datetime(2024, 6, 19),  # Juneteenth
-        datetime(2024, 7, 4),   # Independence Day
-        datetime(2024, 9, 2),   # Labor Day
-        datetime(2024, 11, 28), # Thanksgiving
-        datetime(2024, 12, 25), # Christmas
-    ]
-    
-    is_holiday = now_et.date() in [h.date() for h in holidays]
+    is_holiday = now_et.date() in _HOLIDAY_DATES
     
     # Status
     if not is_weekday or is_holiday:
@@ -70,7 +97,7 @@ def get_market_status() -> Dict:
     
     elif market_open <= current_time <= market_close:
         # Regular trading hours
-        close_time = now_et.replace(hour=16, minute=0, second=0)
+        close_time = _day_bounds(now_et.date())[1]
         time_to_close = close_time - now_et
         
         return {
@@ -85,7 +112,7 @@ def get_market_status() -> Dict:
     
     elif premarket_open <= current_time < market_open:
         # Pre-market
-        open_time = now_et.replace(hour=9, minute=30, second=0)
+        open_time = _day_bounds(now_et.date())[0]
         time_to_open = open_time - now_et
         
         return {
@@ -132,18 +159,36 @@ def get_next_market_open(current_time: datetime) -> datetime:
     """
     Vypočítá, kdy se trh příště otevře
     """
-    et_tz = pytz.timezone('America/New_York')
-    next_open = current_time.replace(hour=9, minute=30, second=0, microsecond=0)
+    next_day = current_time.date()
     
     # Pokud je po 9:30, posuň na další den
-    if current_time.time() >= time(9, 30):
-        next_open += timedelta(days=1)
+    if current_time.time() >= _MARKET_OPEN:
+        next_day += timedelta(days=1)
     
     # Přeskoč víkendy
-    while next_open.weekday() >= 5:  # Saturday = 5, Sunday = 6
-        next_open += timedelta(days=1)
+    while next_day.weekday() >= 5:  # Saturday = 5, Sunday = 6
+        next_day += timedelta(days=1)
+    
+    return _day_bounds(next_day)[0]
+
+@lru_cache(maxsize=8)
+def _day_bounds(day: date) -> Tuple[datetime, datetime]:
+    """
+    Otevření a zavření regular session pro daný den (ET), cachované per datum
+    """
+    return (datetime.combine(day, _MARKET_OPEN, tzinfo=_ET_TZ),
+            datetime.combine(day, _MARKET_CLOSE, tzinfo=_ET_TZ))
+
+def is_trading_day_vec(dates: np.ndarray) -> np.ndarray:
+    """
+    Vektorizovaně zjistí, které dny jsou obchodní (pracovní den a ne svátek)
+    """
+    days = np.asarray(dates).astype('datetime64[D]')
     
-    return next_open
+    # 1970-01-01 byl čtvrtek -> posun o 4 dává Monday = 0
+    weekday = (days.view('i8') - 4) % 7
+    
+    return (weekday < 5) & ~np.isin(days, _HOLIDAYS_ARR)
 
 def format_timedelta(td: timedelta) -> str:
     """
@@ -165,6 +210,27 @@ def format_timedelta(td: timedelta) -> str:
     else:
         return f"{minutes}m"
 
+def format_timedelta_series(td_series: pd.Series) -> pd.Series:
+    """
+    Vektorizovaná verze format_timedelta pro celý sloupec timedelt
+    """
+    total_seconds = np.trunc(td_series.dt.total_seconds().to_numpy()).astype(np.int64)
+    
+    days = (total_seconds // 86400).astype(str)
+    hours = ((total_seconds % 86400) // 3600).astype(str)
+    minutes = ((total_seconds % 3600) // 60).astype(str)
+    
+    hm = np.char.add(np.char.add(hours, 'h '), np.char.add(minutes, 'm'))
+    dhm = np.char.add(np.char.add(days, 'd '), hm)
+    
+    formatted = np.where(
+        total_seconds < 0, 'Expired',
+        np.where(total_seconds >= 86400, dhm,
+                 np.where(total_seconds >= 3600, hm, np.char.add(minutes, 'm')))
+    )
+    
+    return pd.Series(formatted, index=td_series.index, dtype=object)
+
 def calculate_position_size(account_balance: float, risk_percentage: float,
                            stop_loss_points: float, point_value: float) -> int:
     """
@@ -211,12 +277,13 @@ def generate_trade_id() -> str:
     from uuid import uuid4
     return str(uuid4())[:8]
 
-def calculate_kelly_criterion(win_rate: float, avg_win: float, avg_loss: float) -> float:
+@njit(cache=True)
+def _kelly(win_rate, avg_win, avg_loss):
     """
-    Vypočítá optimální velikost pozice podle Kelly Criterion
+    Skalární Kelly kernel (použitelný i uvnitř @njit backtestů)
     """
     if avg_loss == 0:
-        return 0
+        return 0.0
     
     b = avg_win / avg_loss
     p = win_rate
@@ -228,11 +295,22 @@ def calculate_kelly_criterion(win_rate: float, avg_win: float, avg_loss: float)
     conservative_kelly = kelly * 0.25
     
     # Omezit na maximum 10% účtu
-    return min(max(conservative_kelly, 0), 0.10)
+    return min(max(conservative_kelly, 0.0), 0.10)
 
-def estimate_slippage(volume: int, order_size: int, spread: float) -> float:
+@njit(cache=True)
+def _kelly_vec(win_rates, avg_wins, avg_losses):
     """
-    Odhadne slippage pro daný order
+    Kelly kernel přes pole obchodů
+    """
+    out = np.empty(win_rates.size)
+    for i in range(win_rates.size):
+        out[i] = _kelly(win_rates[i], avg_wins[i], avg_losses[i])
+    return out
+
+@njit(cache=True)
+def _slippage(volume, order_size, spread):
+    """
+    Skalární kernel odhadu slippage
     """
     # Základní slippage z bid-ask spreadu
     base_slippage = spread / 2
@@ -248,29 +326,76 @@ def estimate_slippage(volume: int, order_size: int, spread: float) -> float:
     # Maximum 1% slippage
     return min(total_slippage, 0.01)
 
-def calculate_var(returns: list, confidence_level: float = 0.95) -> float:
+@njit(cache=True)
+def _slippage_vec(volumes, order_sizes, spreads):
+    """
+    Slippage kernel přes pole orderů
+    """
+    out = np.empty(volumes.size)
+    for i in range(volumes.size):
+        out[i] = _slippage(volumes[i], order_sizes[i], spreads[i])
+    return out
+
+def calculate_kelly_criterion(win_rate: float, avg_win: float, avg_loss: float) -> float:
+    """
+    Vypočítá optimální velikost pozice podle Kelly Criterion
+    """
+    return _kelly(float(win_rate), float(avg_win), float(avg_loss))
+
+def calculate_kelly_criterion_vec(win_rates, avg_wins, avg_losses) -> np.ndarray:
+    """
+    Kelly Criterion pro pole obchodů najednou (vstupy se broadcastují)
+    """
+    arrays = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64) for x in (win_rates, avg_wins, avg_losses)))
+    shape = arrays[0].shape
+    return _kelly_vec(*(np.ascontiguousarray(x).ravel() for x in arrays)).reshape(shape)
+
+def estimate_slippage(volume: int, order_size: int, spread: float) -> float:
+    """
+    Odhadne slippage pro daný order
+    """
+    return _slippage(float(volume), float(order_size), float(spread))
+
+def estimate_slippage_vec(volumes, order_sizes, spreads) -> np.ndarray:
+    """
+    Odhad slippage pro pole orderů najednou (vstupy se broadcastují)
+    """
+    arrays = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64) for x in (volumes, order_sizes, spreads)))
+    shape = arrays[0].shape
+    return _slippage_vec(*(np.ascontiguousarray(x).ravel() for x in arrays)).reshape(shape)
+
+def calculate_var(returns: Union[list, np.ndarray], confidence_level: float = 0.95) -> float:
     """
     Vypočítá Value at Risk
     """
-    if not returns:
+    returns_array = np.asarray(returns, dtype=np.float64)
+    
+    if returns_array.size == 0:
         return 0
     
-    sorted_returns = sorted(returns)
-    index = int((1 - confidence_level) * len(sorted_returns))
+    index = int((1 - confidence_level) * returns_array.size)
     
-    return abs(sorted_returns[index]) if index < len(sorted_returns) else 0
+    if index >= returns_array.size:
+        return 0
+    
+    # O(N) výběr k-tého nejmenšího místo řazení celého pole
+    return abs(float(np.partition(returns_array, index)[index]))
 
-def calculate_sharpe_ratio(returns: list, risk_free_rate: float = 0.05) -> float:
+def calculate_sharpe_ratio(returns: Union[list, np.ndarray], risk_free_rate: float = 0.05) -> float:
     """
     Vypočítá Sharpe Ratio
     """
-    if not returns or len(returns) < 2:
+    returns_array = np.asarray(returns, dtype=np.float64)
+    
+    if returns_array.size < 2:
         return 0
     
-    returns_array = np.array(returns)
     excess_returns = returns_array - risk_free_rate / 252  # Daily risk-free rate
     
-    if np.std(excess_returns) == 0:
+    # Směrodatnou odchylku spočítat jen jednou
+    std = excess_returns.std()
+    
+    if std == 0:
         return 0
     
-    return np.sqrt(252) * (np.mean(excess_returns) / np.std(excess_returns))
+    return float(np.sqrt(252) * excess_returns.mean() / std)